@@ -160,6 +160,7 @@ CREATE TABLE IF NOT EXISTS PayrollRuns (
   Status VARCHAR(50) NOT NULL DEFAULT 'Pending',
   ProcessedDate DATETIME NULL,
   INDEX idx_payrollruns_paymentdate (PaymentDate),
+  INDEX idx_payrollruns_periodend (PayPeriodEndDate),
   INDEX idx_payrollruns_status (Status)
 ) ENGINE=InnoDB;
 
@@ -288,6 +289,7 @@ CREATE TABLE IF NOT EXISTS AttendanceRecords (
   Status VARCHAR(50) NULL, -- 'Present','Absent','Late'...
   Notes VARCHAR(255) NULL,
   INDEX (EmployeeID, AttendanceDate),
+  INDEX idx_attendance_date (AttendanceDate),
   CONSTRAINT fk_attendance_employee FOREIGN KEY (EmployeeID) REFERENCES Employees(EmployeeID) ON DELETE CASCADE
 ) ENGINE=InnoDB;
 
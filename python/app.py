@@ -17,6 +17,9 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from services.data_processor import DataProcessor
+from services.resilience import CircuitBreaker, CircuitOpenError, ConcurrencyLimiter, StaleCache
+
 # Load environment variables
 load_dotenv()
 
@@ -34,22 +37,150 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Database configuration
+DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', 10))
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
     'user': os.getenv('DB_USER', 'root'),
     'password': os.getenv('DB_PASS', ''),
     'database': os.getenv('DB_NAME', 'hr441'),
-    'charset': 'utf8mb4'
+    'charset': 'utf8mb4',
+    'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+    'read_timeout': DB_STATEMENT_TIMEOUT + 5,
+    'write_timeout': DB_STATEMENT_TIMEOUT + 5
 }
 
-def get_db_connection():
-    """Get database connection"""
+data_processor = DataProcessor(DB_CONFIG)
+
+# Circuit breakers fail fast while a backend is down instead of tying up workers
+# 2003 can't connect, 2006 server gone away, 2013/2055 lost connection (incl. read timeout),
+# 1040 too many connections, 3024 MySQL / 1969 MariaDB statement timeout
+DB_OUTAGE_ERRNOS = {2003, 2006, 2013, 2055, 1040, 3024, 1969}
+
+def is_db_backend_failure(exc):
+    """Only connectivity and timeout errors count towards the database breaker.
+
+    PyMySQL also raises OperationalError for plain query errors such as 1054
+    (unknown column); those are bugs in the request, not an outage.
+    """
+    if not isinstance(exc, pymysql.err.MySQLError):
+        return False
+    return bool(exc.args) and exc.args[0] in DB_OUTAGE_ERRNOS
+
+db_breaker = CircuitBreaker(
+    'database',
+    failure_threshold=int(os.getenv('DB_BREAKER_THRESHOLD', 5)),
+    reset_timeout=float(os.getenv('DB_BREAKER_RESET', 30)),
+    is_failure=is_db_backend_failure
+)
+
+def is_smtp_backend_failure(exc):
+    """Only transport and server failures count towards the SMTP breaker.
+
+    Refused senders/recipients and rejected message content come from the
+    request, so they must not open the circuit for everyone else.
+    """
+    if isinstance(exc, (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)):
+        return False
+    if isinstance(exc, smtplib.SMTPDataError):
+        # 4xx is a transient server condition; 5xx rejects this message
+        return 400 <= exc.smtp_code < 500
+    # Connect/disconnect/auth/HELO errors and socket errors or timeouts (OSError)
+    return isinstance(exc, OSError)
+
+smtp_breaker = CircuitBreaker(
+    'smtp',
+    failure_threshold=int(os.getenv('SMTP_BREAKER_THRESHOLD', 3)),
+    reset_timeout=float(os.getenv('SMTP_BREAKER_RESET', 60)),
+    is_failure=is_smtp_backend_failure
+)
+
+# Separate budgets so heavy analytics cannot starve light endpoints such as login email
+heavy_limiter = ConcurrencyLimiter('analytics', int(os.getenv('HEAVY_MAX_CONCURRENT', 4)),
+                                   wait_timeout=float(os.getenv('HEAVY_ADMISSION_WAIT', 0.5)))
+light_limiter = ConcurrencyLimiter('light', int(os.getenv('LIGHT_MAX_CONCURRENT', 32)),
+                                   wait_timeout=float(os.getenv('LIGHT_ADMISSION_WAIT', 2)))
+
+analytics_cache = StaleCache()
+
+SMTP_UNAVAILABLE_MESSAGE = 'Email service temporarily unavailable'
+
+def _apply_statement_timeout(connection):
+    """Cap server-side query execution time for this session"""
+    with connection.cursor() as cursor:
+        try:
+            # MySQL 5.7+ (milliseconds, SELECT only)
+            cursor.execute("SET SESSION max_execution_time = %s", (DB_STATEMENT_TIMEOUT * 1000,))
+        except pymysql.err.MySQLError:
+            try:
+                # MariaDB (seconds)
+                cursor.execute("SET SESSION max_statement_time = %s", (DB_STATEMENT_TIMEOUT,))
+            except pymysql.err.MySQLError as e:
+                logger.warning(f"Could not set statement timeout: {e}")
+
+def _connect():
+    connection = pymysql.connect(**DB_CONFIG)
+    _apply_statement_timeout(connection)
+    return connection
+
+def _run_with_connection(compute):
+    conn = _connect()
+    try:
+        return compute(conn)
+    finally:
+        conn.close()
+
+def _stale_or_error(cache_key, message, status):
+    """Serve the last good result for this request, or an error if there is none"""
+    cached = analytics_cache.get(cache_key)
+    if cached:
+        stored_at, data = cached
+        return jsonify({
+            'success': True,
+            'data': data,
+            'stale': True,
+            'cached_at': datetime.fromtimestamp(stored_at).isoformat()
+        })
+    response = jsonify({'error': message})
+    if status == 503:
+        response.headers['Retry-After'] = '30'
+    return response, status
+
+def serve_analytics(compute, error_message):
+    """Run a heavy analytics computation under admission control and the DB breaker.
+
+    ``compute`` receives a connection and returns the response data. When the
+    analytics budget is exhausted, the database is failing or the circuit is
+    open, the last good result for the same request is served instead.
+    """
+    cache_key = request.full_path
+    if not heavy_limiter.acquire():
+        return _stale_or_error(cache_key, 'Analytics service busy', 503)
+
     try:
-        connection = pymysql.connect(**DB_CONFIG)
-        return connection
+        data = db_breaker.call(_run_with_connection, compute)
+    except CircuitOpenError:
+        return _stale_or_error(cache_key, 'Database temporarily unavailable', 503)
     except Exception as e:
-        logger.error(f"Database connection error: {e}")
-        return None
+        logger.error(f"{error_message}: {e}")
+        return _stale_or_error(cache_key, error_message, 500)
+    finally:
+        heavy_limiter.release()
+
+    analytics_cache.set(cache_key, data)
+    return jsonify({
+        'success': True,
+        'data': data
+    })
+
+def _deliver_smtp(smtp_host, smtp_port, use_tls, smtp_user, smtp_pass, smtp_from, recipients, message):
+    server = smtplib.SMTP(smtp_host, smtp_port, timeout=float(os.getenv('SMTP_TIMEOUT', 15)))
+    try:
+        if use_tls:
+            server.starttls()
+        server.login(smtp_user, smtp_pass)
+        server.sendmail(smtp_from, recipients, message.as_string())
+    finally:
+        server.quit()
 
 def send_email_smtp(recipient_email: str, subject: str, body: str, is_html: bool = False) -> tuple[bool, str]:
     """Send an email using SMTP settings from environment variables.
@@ -78,16 +209,13 @@ def send_email_smtp(recipient_email: str, subject: str, body: str, is_html: bool
             mime_part = MIMEText(body, 'plain')
         message.attach(mime_part)
 
-        server = smtplib.SMTP(smtp_host, smtp_port, timeout=15)
-        try:
-            if use_tls:
-                server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_from, [recipient_email], message.as_string())
-        finally:
-            server.quit()
+        smtp_breaker.call(_deliver_smtp, smtp_host, smtp_port, use_tls, smtp_user, smtp_pass,
+                          smtp_from, [recipient_email], message)
 
         return True, 'Email sent'
+    except CircuitOpenError:
+        logger.warning("SMTP circuit open, not sending")
+        return False, SMTP_UNAVAILABLE_MESSAGE
     except Exception as e:
         logger.error(f"SMTP send error: {e}")
         return False, f"SMTP send error: {e}"
@@ -98,7 +226,11 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'service': 'hr-python-api'
+        'service': 'hr-python-api',
+        'circuits': {
+            'database': db_breaker.state,
+            'smtp': smtp_breaker.state
+        }
     })
 
 @app.route('/api/notify/email', methods=['POST'])
@@ -113,6 +245,9 @@ def notify_email():
         "is_html": false
     }
     """
+    if not light_limiter.acquire():
+        return jsonify({'success': False, 'error': 'Server busy, try again'}), 503, {'Retry-After': '5'}
+
     try:
         payload = request.get_json(silent=True) or {}
         recipient = (payload.get('to') or '').strip()
@@ -124,115 +259,89 @@ def notify_email():
             return jsonify({'success': False, 'error': 'Missing to/subject/body'}), 400
 
         ok, msg = send_email_smtp(recipient, subject, body, is_html)
-        status = 200 if ok else 500
+        if ok:
+            status = 200
+        elif msg == SMTP_UNAVAILABLE_MESSAGE:
+            status = 503
+        else:
+            status = 500
         return jsonify({'success': ok, 'message': msg}), status
     except Exception as e:
         logger.error(f"notify_email error: {e}")
         return jsonify({'success': False, 'error': 'Failed to send email'}), 500
+    finally:
+        light_limiter.release()
 
 @app.route('/api/analytics/dashboard', methods=['GET'])
 @jwt_required()
 def get_analytics_dashboard():
     """Get comprehensive analytics dashboard data"""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-
-        # Get employee statistics
-        employee_stats = get_employee_statistics(conn)
-        
-        # Get payroll statistics
-        payroll_stats = get_payroll_statistics(conn)
-        
-        # Get department distribution
-        department_stats = get_department_statistics(conn)
-        
-        # Get recent activities
-        recent_activities = get_recent_activities(conn)
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'employee_stats': employee_stats,
-                'payroll_stats': payroll_stats,
-                'department_stats': department_stats,
-                'recent_activities': recent_activities
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Analytics dashboard error: {e}")
-        return jsonify({'error': 'Failed to generate analytics'}), 500
+    def compute(conn):
+        return {
+            'employee_stats': get_employee_statistics(conn),
+            'payroll_stats': get_payroll_statistics(conn),
+            'department_stats': get_department_statistics(conn),
+            'recent_activities': get_recent_activities(conn)
+        }
+
+    return serve_analytics(compute, 'Failed to generate analytics')
 
 @app.route('/api/analytics/reports', methods=['GET'])
 @jwt_required()
 def get_analytics_reports():
     """Get available analytics reports"""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-
-        report_type = request.args.get('type', 'all')
-        
-        if report_type == 'payroll' or report_type == 'all':
-            payroll_report = generate_payroll_report(conn)
-        else:
-            payroll_report = None
-            
-        if report_type == 'employee' or report_type == 'all':
-            employee_report = generate_employee_report(conn)
-        else:
-            employee_report = None
-            
-        if report_type == 'attendance' or report_type == 'all':
-            attendance_report = generate_attendance_report(conn)
-        else:
-            attendance_report = None
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'payroll_report': payroll_report,
-                'employee_report': employee_report,
-                'attendance_report': attendance_report
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Analytics reports error: {e}")
-        return jsonify({'error': 'Failed to generate reports'}), 500
+    report_type = request.args.get('type', 'all')
+
+    def compute(conn):
+        return {
+            'payroll_report': generate_payroll_report(conn) if report_type in ('payroll', 'all') else None,
+            'employee_report': generate_employee_report(conn) if report_type in ('employee', 'all') else None,
+            'attendance_report': generate_attendance_report(conn) if report_type in ('attendance', 'all') else None
+        }
+
+    return serve_analytics(compute, 'Failed to generate reports')
 
 @app.route('/api/analytics/metrics', methods=['GET'])
 @jwt_required()
 def get_analytics_metrics():
     """Get key performance metrics"""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-
-        metrics = {
+    def compute(conn):
+        return {
             'employee_metrics': calculate_employee_metrics(conn),
             'payroll_metrics': calculate_payroll_metrics(conn),
             'productivity_metrics': calculate_productivity_metrics(conn)
         }
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'data': metrics
-        })
-        
-    except Exception as e:
-        logger.error(f"Analytics metrics error: {e}")
-        return jsonify({'error': 'Failed to calculate metrics'}), 500
+
+    return serve_analytics(compute, 'Failed to calculate metrics')
+
+@app.route('/api/analytics/turnover', methods=['GET'])
+@jwt_required()
+def get_analytics_turnover():
+    """Get monthly headcount, attrition and hire-cohort retention.
+
+    Query params: start_date, end_date (YYYY-MM-DD, inclusive), horizon (months, default 12)
+    """
+    today = datetime.now().date()
+    default_start = today.replace(year=today.year - 1, day=1).isoformat()
+    try:
+        start_date = datetime.strptime(request.args.get('start_date', default_start), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end_date', today.isoformat()), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date must be YYYY-MM-DD'}), 400
+    if start_date > end_date:
+        return jsonify({'error': 'start_date must not be after end_date'}), 400
+
+    try:
+        horizon = int(request.args.get('horizon', 12))
+    except ValueError:
+        horizon = -1
+    if not 0 <= horizon <= 120:
+        return jsonify({'error': 'horizon must be an integer between 0 and 120'}), 400
+
+    def compute(conn):
+        return data_processor.get_turnover_engine(conn).summary(start_date, end_date, horizon)
+
+    return serve_analytics(compute, 'Failed to generate turnover report')
 
 def get_employee_statistics(conn):
     """Get employee statistics"""
@@ -240,13 +349,14 @@ def get_employee_statistics(conn):
     SELECT 
         COUNT(*) as total_employees,
         SUM(CASE WHEN IsActive = 1 THEN 1 ELSE 0 END) as active_employees,
-        SUM(CASE WHEN IsActive = 0 THEN 1 ELSE 0 END) as inactive_employees,
-        AVG(CASE WHEN IsActive = 1 THEN DATEDIFF(CURDATE(), HireDate) ELSE NULL END) as avg_tenure_days
+        SUM(CASE WHEN IsActive = 0 THEN 1 ELSE 0 END) as inactive_employees
     FROM Employees
     """
     
     df = pd.read_sql(query, conn)
-    return df.to_dict('records')[0]
+    stats = df.to_dict('records')[0]
+    stats['avg_tenure_days'] = data_processor.get_turnover_engine(conn).average_tenure_days()
+    return stats
 
 def get_payroll_statistics(conn):
     """Get payroll statistics"""
@@ -311,6 +421,7 @@ def generate_payroll_report(conn):
 
 def generate_employee_report(conn):
     """Generate employee demographics report"""
+    # Tenure stays in SQL here: it is grouped by Gender, which the turnover engine does not extract
     query = """
     SELECT 
         Gender,
@@ -338,13 +449,14 @@ def calculate_employee_metrics(conn):
     query = """
     SELECT 
         COUNT(*) as total_employees,
-        SUM(CASE WHEN IsActive = 1 THEN 1 ELSE 0 END) as active_employees,
-        AVG(CASE WHEN IsActive = 1 THEN DATEDIFF(CURDATE(), HireDate) ELSE NULL END) as avg_tenure_days
+        SUM(CASE WHEN IsActive = 1 THEN 1 ELSE 0 END) as active_employees
     FROM Employees
     """
     
     df = pd.read_sql(query, conn)
-    return df.to_dict('records')[0]
+    metrics = df.to_dict('records')[0]
+    metrics['avg_tenure_days'] = data_processor.get_turnover_engine(conn).average_tenure_days()
+    return metrics
 
 def calculate_payroll_metrics(conn):
     """Calculate payroll performance metrics"""
@@ -34,6 +34,11 @@ class Config:
     PYTHON_API_URL = os.getenv('PYTHON_API_URL', 'http://localhost:5000/api/')
     PHP_API_URL = os.getenv('PHP_API_URL', 'http://localhost/php/api/')
     
+    # Live update stream configuration
+    STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', 5))
+    STREAM_HEARTBEAT_INTERVAL = float(os.getenv('STREAM_HEARTBEAT_INTERVAL', 15))
+    STREAM_MAX_CONNECTIONS = int(os.getenv('STREAM_MAX_CONNECTIONS', 5000))
+    
     @classmethod
     def get_db_config(cls):
         return {
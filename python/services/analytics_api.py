@@ -1,8 +1,47 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict
 
-app = FastAPI(title="Analytics Service")
+from config import Config
+from services.live_updates import TOPIC_QUERIES, ConnectionLimitExceeded, LiveUpdateHub, Subscriber
+
+hub = LiveUpdateHub(
+    Config.get_db_config(),
+    poll_interval=Config.STREAM_POLL_INTERVAL,
+    max_connections=Config.STREAM_MAX_CONNECTIONS,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    hub.start()
+    yield
+    await hub.stop()
+
+
+app = FastAPI(title="Analytics Service", lifespan=lifespan)
+
+
+class SubscriptionResponse(StreamingResponse):
+    """Streaming response that always releases its hub subscription.
+
+    Cleanup lives here rather than in the body generator, because the generator's
+    ``finally`` never runs if the body is never iterated (e.g. the client is gone
+    before the first send).
+    """
+
+    def __init__(self, content, subscriber: Subscriber, **kwargs):
+        super().__init__(content, **kwargs)
+        self.subscriber = subscriber
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            hub.unsubscribe(self.subscriber)
 
 
 class MetricsRequest(BaseModel):
@@ -20,3 +59,38 @@ async def compute_metrics(req: MetricsRequest) -> Dict:
         'new_hires': 5,
         'attrition_rate': 0.02
     }
+
+
+@app.get('/stream')
+async def stream_updates(request: Request, topics: str = Query('headcount,payroll_status,attendance_today')):
+    """Server-Sent Events stream of dashboard topics.
+
+    Usage: ``new EventSource('/stream?topics=headcount,attendance_today')``.
+    Each topic is sent as a named event whenever its data changes, and a
+    comment line is sent every heartbeat interval to keep proxies open.
+    """
+    requested = [t.strip() for t in topics.split(',') if t.strip()]
+    unknown = [t for t in requested if t not in TOPIC_QUERIES]
+    if not requested or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics: {', '.join(unknown) or 'none given'}")
+
+    try:
+        subscriber = hub.subscribe(requested)
+    except ConnectionLimitExceeded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={'Retry-After': '30'})
+
+    async def event_source():
+        yield f"retry: {int(Config.STREAM_POLL_INTERVAL * 1000)}\n\n"
+        while not await request.is_disconnected():
+            frames = await subscriber.next_frames(Config.STREAM_HEARTBEAT_INTERVAL)
+            if frames:
+                yield ''.join(frames)
+            else:
+                yield ': heartbeat\n\n'
+
+    return SubscriptionResponse(
+        event_source(),
+        subscriber,
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
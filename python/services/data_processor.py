@@ -10,11 +10,16 @@ import pymysql
 import logging
 from typing import Dict, List, Any, Optional
 
+from services.turnover_engine import TurnoverEngine, year_range
+
 logger = logging.getLogger(__name__)
 
 class DataProcessor:
-    def __init__(self, db_config: Dict[str, str]):
+    def __init__(self, db_config: Dict[str, str], turnover_cache_ttl: int = 300):
         self.db_config = db_config
+        self.turnover_cache_ttl = turnover_cache_ttl
+        self._turnover_engine: Optional[TurnoverEngine] = None
+        self._turnover_loaded_at: Optional[datetime] = None
     
     def get_connection(self):
         """Get database connection"""
@@ -24,6 +29,23 @@ class DataProcessor:
             logger.error(f"Database connection error: {e}")
             return None
     
+    def get_turnover_engine(self, conn=None) -> TurnoverEngine:
+        """Get the turnover engine, re-extracting hire/termination dates once the cache expires"""
+        now = datetime.now()
+        if (self._turnover_engine is None or self._turnover_loaded_at is None
+                or now - self._turnover_loaded_at > timedelta(seconds=self.turnover_cache_ttl)):
+            own_conn = conn is None
+            conn = conn or self.get_connection()
+            if not conn:
+                raise ConnectionError('Database connection failed')
+            try:
+                self._turnover_engine = TurnoverEngine.from_connection(conn)
+                self._turnover_loaded_at = now
+            finally:
+                if own_conn:
+                    conn.close()
+        return self._turnover_engine
+    
     def calculate_payroll_summary(self, payroll_run_id: int) -> Dict[str, Any]:
         """Calculate comprehensive payroll summary for a specific run"""
         conn = self.get_connection()
@@ -114,7 +136,8 @@ class DataProcessor:
             return {'error': 'Database connection failed'}
         
         try:
-            # Employee demographics
+            # Employee demographics (per-group tenure stays in SQL; the turnover
+            # engine only extracts hire/termination dates)
             demographics_query = """
             SELECT 
                 Gender,
@@ -142,17 +165,9 @@ class DataProcessor:
             dept_df = pd.read_sql(dept_query, conn)
             
             # Turnover analysis
-            turnover_query = """
-            SELECT 
-                YEAR(TerminationDate) as year,
-                MONTH(TerminationDate) as month,
-                COUNT(*) as terminations
-            FROM Employees
-            WHERE TerminationDate BETWEEN %s AND %s
-            GROUP BY YEAR(TerminationDate), MONTH(TerminationDate)
-            ORDER BY year, month
-            """
-            turnover_df = pd.read_sql(turnover_query, conn, params=[start_date, end_date])
+            engine = self.get_turnover_engine(conn)
+            turnover_df = engine.monthly_series(start_date, end_date)
+            turnover_df['terminations'] = turnover_df['exits']
             
             analytics = {
                 'demographics': demographics_df.to_dict('records'),
@@ -161,7 +176,7 @@ class DataProcessor:
                 'summary': {
                     'total_active_employees': len(dept_df[dept_df['employee_count'] > 0]),
                     'total_departments': len(dept_df),
-                    'avg_tenure_days': demographics_df['avg_tenure_days'].mean()
+                    'avg_tenure_days': engine.average_tenure_days()
                 }
             }
             
@@ -208,32 +223,34 @@ class DataProcessor:
             return {'error': 'Database connection failed'}
         
         try:
-            # Payroll costs by month
+            # Payroll costs by month (run totals live on the payslips)
             payroll_query = """
             SELECT 
-                MONTH(PayPeriodEnd) as month,
-                SUM(TotalGrossPay) as total_gross,
-                SUM(TotalDeductions) as total_deductions,
-                SUM(TotalNetPay) as total_net
-            FROM PayrollRuns
-            WHERE YEAR(PayPeriodEnd) = %s AND Status = 'Completed'
-            GROUP BY MONTH(PayPeriodEnd)
+                MONTH(pr.PayPeriodEndDate) as month,
+                SUM(ps.GrossIncome) as total_gross,
+                SUM(ps.TotalDeductions) as total_deductions,
+                SUM(ps.NetIncome) as total_net
+            FROM PayrollRuns pr
+            JOIN Payslips ps ON ps.PayrollID = pr.PayrollID
+            WHERE pr.PayPeriodEndDate >= %s AND pr.PayPeriodEndDate < %s AND pr.Status = 'Completed'
+            GROUP BY MONTH(pr.PayPeriodEndDate)
             ORDER BY month
             """
-            payroll_df = pd.read_sql(payroll_query, conn, params=[year])
+            year_start, year_end = year_range(year)
+            payroll_df = pd.read_sql(payroll_query, conn, params=[year_start, year_end])
             
-            # Benefits and deductions breakdown
+            # Benefits and deductions breakdown (deductions are dated by their payroll run)
             benefits_query = """
             SELECT 
-                dt.DeductionTypeName,
-                SUM(d.Amount) as total_amount
-            FROM Deductions d
-            JOIN DeductionTypes dt ON d.DeductionTypeID = dt.DeductionTypeID
-            WHERE YEAR(d.EffectiveDate) = %s
-            GROUP BY dt.DeductionTypeName
+                d.DeductionType as DeductionTypeName,
+                SUM(d.DeductionAmount) as total_amount
+            FROM PayrollRuns pr
+            JOIN Deductions d ON d.PayrollID = pr.PayrollID
+            WHERE pr.PayPeriodEndDate >= %s AND pr.PayPeriodEndDate < %s
+            GROUP BY d.DeductionType
             ORDER BY total_amount DESC
             """
-            benefits_df = pd.read_sql(benefits_query, conn, params=[year])
+            benefits_df = pd.read_sql(benefits_query, conn, params=[year_start, year_end])
             
             summary = {
                 'year': year,
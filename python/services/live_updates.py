@@ -0,0 +1,240 @@
+"""
+Live Updates Service
+Computes dashboard topic snapshots once and fans them out to SSE subscribers
+"""
+
+import asyncio
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+# Each topic has a version query (checked every poll) and a payload query (only
+# run when the version changes). Versions checksum every column the payload
+# depends on, so edits that keep row counts unchanged are still broadcast.
+TOPIC_QUERIES: Dict[str, Dict[str, str]] = {
+    'headcount': {
+        'version': """
+            SELECT
+                (SELECT CONCAT_WS(':', COUNT(*),
+                        BIT_XOR(CRC32(CONCAT_WS('|', EmployeeID, IsActive, COALESCE(DepartmentID, '')))))
+                 FROM Employees) as employees,
+                (SELECT CONCAT_WS(':', COUNT(*),
+                        BIT_XOR(CRC32(CONCAT_WS('|', DepartmentID, COALESCE(DepartmentName, '')))))
+                 FROM OrganizationalStructure) as departments
+        """,
+        'payload': """
+            SELECT
+                d.DepartmentName,
+                COUNT(e.EmployeeID) as active_employees
+            FROM OrganizationalStructure d
+            LEFT JOIN Employees e ON d.DepartmentID = e.DepartmentID AND e.IsActive = 1
+            GROUP BY d.DepartmentID, d.DepartmentName
+            ORDER BY active_employees DESC
+        """,
+    },
+    'payroll_status': {
+        'version': """
+            SELECT COUNT(*),
+                   BIT_XOR(CRC32(CONCAT_WS('|', PayrollID, PayPeriodStartDate, PayPeriodEndDate,
+                                           PaymentDate, Status, COALESCE(ProcessedDate, ''))))
+            FROM PayrollRuns
+        """,
+        'payload': """
+            SELECT PayrollID, PayPeriodStartDate, PayPeriodEndDate, PaymentDate,
+                   Status, ProcessedDate
+            FROM PayrollRuns
+            ORDER BY PaymentDate DESC, PayrollID DESC
+            LIMIT 5
+        """,
+    },
+    'attendance_today': {
+        # Both queries rely on idx_attendance_date (sql/add_attendance_date_index.sql);
+        # without it every poll scans the whole table
+        'version': """
+            SELECT COUNT(*),
+                   BIT_XOR(CRC32(CONCAT_WS('|', RecordID, EmployeeID, COALESCE(Status, ''),
+                                           COALESCE(ClockInTime, ''), COALESCE(ClockOutTime, ''))))
+            FROM AttendanceRecords
+            WHERE AttendanceDate = CURDATE()
+        """,
+        'payload': """
+            SELECT COALESCE(Status, 'Unknown') as status, COUNT(*) as count
+            FROM AttendanceRecords
+            WHERE AttendanceDate = CURDATE()
+            GROUP BY COALESCE(Status, 'Unknown')
+        """,
+    },
+}
+
+
+class ConnectionLimitExceeded(Exception):
+    """Raised when the hub is already serving the maximum number of streams"""
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def format_sse(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    """Format a single Server-Sent Events frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=_json_default, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscriber:
+    """A single stream connection.
+
+    Pending frames are kept per topic, so a slow client only ever holds the
+    latest frame for each topic it follows instead of an unbounded backlog.
+    """
+
+    def __init__(self, topics: Iterable[str]):
+        self.topics: Set[str] = set(topics)
+        self._pending: Dict[str, str] = {}
+        self._wakeup = asyncio.Event()
+
+    def push(self, topic: str, frame: str) -> None:
+        self._pending[topic] = frame
+        self._wakeup.set()
+
+    async def next_frames(self, timeout: float) -> List[str]:
+        """Wait up to ``timeout`` seconds for frames; returns [] on timeout"""
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        frames = list(self._pending.values())
+        self._pending.clear()
+        self._wakeup.clear()
+        return frames
+
+
+class LiveUpdateHub:
+    """Polls topic versions in one background task and broadcasts changes"""
+
+    def __init__(self, db_config: Dict[str, Any], poll_interval: float = 5.0,
+                 max_connections: int = 5000, query_timeout: int = 10):
+        self.db_config = db_config
+        self.poll_interval = poll_interval
+        self.max_connections = max_connections
+        self.query_timeout = query_timeout
+        self._subscribers: Set[Subscriber] = set()
+        self._versions: Dict[str, Tuple] = {}
+        self._frames: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._conn = None
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, topics: Iterable[str]) -> Subscriber:
+        """Register a stream; the latest known frame per topic is queued immediately"""
+        if len(self._subscribers) >= self.max_connections:
+            raise ConnectionLimitExceeded(f"Stream limit of {self.max_connections} reached")
+
+        subscriber = Subscriber(topics)
+        for topic in subscriber.topics:
+            if topic in self._frames:
+                subscriber.push(topic, self._frames[topic])
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _active_topics(self) -> Set[str]:
+        topics: Set[str] = set()
+        for subscriber in self._subscribers:
+            topics |= subscriber.topics
+        return topics
+
+    async def _run(self) -> None:
+        while True:
+            topics = self._active_topics()
+            if topics:
+                try:
+                    changed = await asyncio.to_thread(self._poll, topics)
+                    for topic, frame in changed.items():
+                        self._broadcast(topic, frame)
+                except Exception as e:
+                    logger.error(f"Live update poll error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _broadcast(self, topic: str, frame: str) -> None:
+        self._frames[topic] = frame
+        for subscriber in self._subscribers:
+            if topic in subscriber.topics:
+                subscriber.push(topic, frame)
+
+    def _get_connection(self):
+        if self._conn is None:
+            self._conn = pymysql.connect(
+                **self.db_config,
+                read_timeout=self.query_timeout,
+                write_timeout=self.query_timeout,
+                cursorclass=pymysql.cursors.DictCursor,
+                autocommit=True,
+            )
+        else:
+            self._conn.ping(reconnect=True)
+        return self._conn
+
+    def _poll(self, topics: Set[str]) -> Dict[str, str]:
+        """Runs in a worker thread; returns a ready-to-send frame per changed topic"""
+        changed: Dict[str, str] = {}
+        try:
+            conn = self._get_connection()
+            with conn.cursor() as cursor:
+                for topic in sorted(topics):
+                    queries = TOPIC_QUERIES[topic]
+                    cursor.execute(queries['version'])
+                    version = tuple(cursor.fetchone().values())
+                    if self._versions.get(topic) == version:
+                        continue
+
+                    cursor.execute(queries['payload'])
+                    rows = cursor.fetchall()
+                    self._versions[topic] = version
+                    changed[topic] = format_sse(
+                        topic,
+                        {'topic': topic, 'timestamp': datetime.now().isoformat(), 'data': rows},
+                        event_id=':'.join(str(v) for v in version),
+                    )
+        except Exception:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            raise
+        return changed
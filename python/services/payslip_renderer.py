@@ -0,0 +1,312 @@
+"""
+Payslip Batch Renderer
+Renders every payslip of a payroll run to HTML in one pass for distribution
+or archiving. Mirrors the layout of php/api/generate_payslip_html.php.
+"""
+
+import argparse
+import html
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+PAYSLIPS_QUERY = """
+SELECT
+    p.*,
+    CONCAT(e.FirstName, ' ', e.LastName) AS EmployeeName,
+    e.JobTitle AS EmployeeJobTitle,
+    e.EmployeeID AS EmployeeNumber,
+    d.DepartmentName
+FROM Payslips p
+JOIN Employees e ON p.EmployeeID = e.EmployeeID
+LEFT JOIN OrganizationalStructure d ON e.DepartmentID = d.DepartmentID
+WHERE p.PayrollID = %s
+ORDER BY p.EmployeeID
+"""
+
+MONEY_FIELDS = (
+    'BasicSalary', 'HourlyRate', 'HoursWorked', 'RegularPay', 'OvertimePay', 'HolidayPay',
+    'NightDifferentialPay', 'BonusesTotal', 'OtherEarnings', 'GrossIncome', 'SSS_Contribution',
+    'PhilHealth_Contribution', 'PagIBIG_Contribution', 'WithholdingTax', 'OtherDeductionsTotal',
+    'TotalDeductions', 'NetIncome',
+)
+TEXT_FIELDS = ('EmployeeName', 'EmployeeNumber', 'EmployeeJobTitle', 'DepartmentName', 'PayrollID', 'PayslipID')
+
+# Templates are compiled once at import, so each worker process parses them only once
+HOURLY_TEMPLATE = Template("""
+                <div class="payslip-item"><strong>Hourly Rate:</strong> <span>$HourlyRate</span></div>
+                <div class="payslip-item"><strong>Hours Worked:</strong> <span>$HoursWorked</span></div>""")
+
+PAYSLIP_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Payslip - $EmployeeName - $PayPeriodStart to $PayPeriodEnd</title>
+    <style>
+        body { font-family: 'Georgia', serif; margin: 0; padding: 0; background-color: #fff; color: #333; }
+        .payslip-container { width: 100%; max-width: 800px; margin: 20px auto; padding: 25px; border: 1px solid #ddd; }
+        .payslip-header { text-align: center; margin-bottom: 25px; border-bottom: 2px solid #4A5568; padding-bottom: 15px; }
+        .payslip-header h1 { font-family: 'Cinzel', serif; font-size: 24px; color: #2D3748; margin: 0 0 5px 0; }
+        .payslip-header p { font-size: 14px; color: #4A5568; margin: 0; }
+        .employee-details, .payroll-details { margin-bottom: 20px; padding-bottom: 15px; border-bottom: 1px dashed #ccc; }
+        h2 { font-family: 'Cinzel', serif; font-size: 18px; color: #4E3B2A; margin-bottom: 10px; border-bottom: 1px solid #eee; padding-bottom: 5px; }
+        .grid-cols-payslip { display: grid; grid-template-columns: repeat(2, minmax(0, 1fr)); gap: 1rem; }
+        .payslip-item { display: flex; justify-content: space-between; padding: 4px 0; font-size: 13px; }
+        .payslip-item strong { color: #4A5568; margin-right: 8px; min-width: 150px; display: inline-block; }
+        .payslip-item span { text-align: right; color: #2D3748; }
+        .earnings-deductions { display: grid; grid-template-columns: 1fr 1fr; gap: 2rem; margin-bottom: 20px; }
+        .summary { margin-top: 1.5rem; padding-top: 1rem; border-top: 2px solid #a0aec0; }
+        .net-pay strong, .net-pay span { font-size: 18px; font-weight: bold; color: #2C5282; }
+        .payslip-footer { text-align: center; margin-top: 30px; padding-top: 15px; border-top: 1px solid #eee; font-size: 12px; color: #718096; }
+        @media print {
+            body { -webkit-print-color-adjust: exact; color-adjust: exact; }
+            .payslip-container { margin: 0; border: none; max-width: 100%; padding: 5mm; }
+        }
+    </style>
+</head>
+<body>
+    <div class="payslip-container">
+        <div class="payslip-header">
+            <h1>Avalon HR Management System</h1>
+            <p>Payslip</p>
+        </div>
+
+        <div class="employee-details">
+            <h2>Employee Information</h2>
+            <div class="grid-cols-payslip">
+                <div class="payslip-item"><strong>Employee Name:</strong> <span>$EmployeeName</span></div>
+                <div class="payslip-item"><strong>Employee ID:</strong> <span>$EmployeeNumber</span></div>
+                <div class="payslip-item"><strong>Job Title:</strong> <span>$EmployeeJobTitle</span></div>
+                <div class="payslip-item"><strong>Department:</strong> <span>$DepartmentName</span></div>
+            </div>
+        </div>
+
+        <div class="payroll-details">
+            <h2>Payroll Information</h2>
+            <div class="grid-cols-payslip">
+                <div class="payslip-item"><strong>Pay Period:</strong> <span>$PayPeriodStart - $PayPeriodEnd</span></div>
+                <div class="payslip-item"><strong>Payment Date:</strong> <span>$PaymentDate</span></div>
+                <div class="payslip-item"><strong>Payroll Run ID:</strong> <span>$PayrollID</span></div>
+                <div class="payslip-item"><strong>Payslip ID:</strong> <span>$PayslipID</span></div>
+            </div>
+        </div>
+
+        <div class="earnings-deductions">
+            <div>
+                <h2>Earnings</h2>
+                <div class="payslip-item"><strong>Basic Salary Component:</strong> <span>$BasicSalary</span></div>$HourlyBlock
+                <div class="payslip-item"><strong>Regular Pay:</strong> <span>$RegularPay</span></div>
+                <div class="payslip-item"><strong>Overtime Pay:</strong> <span>$OvertimePay</span></div>
+                <div class="payslip-item"><strong>Holiday Pay:</strong> <span>$HolidayPay</span></div>
+                <div class="payslip-item"><strong>Night Differential:</strong> <span>$NightDifferentialPay</span></div>
+                <div class="payslip-item"><strong>Bonuses:</strong> <span>$BonusesTotal</span></div>
+                <div class="payslip-item"><strong>Other Earnings:</strong> <span>$OtherEarnings</span></div>
+                <hr>
+                <div class="payslip-item"><strong>GROSS INCOME:</strong> <span>$GrossIncome</span></div>
+            </div>
+            <div>
+                <h2>Deductions</h2>
+                <div class="payslip-item"><strong>SSS Contribution:</strong> <span>$SSS_Contribution</span></div>
+                <div class="payslip-item"><strong>PhilHealth Contribution:</strong> <span>$PhilHealth_Contribution</span></div>
+                <div class="payslip-item"><strong>Pag-IBIG Contribution:</strong> <span>$PagIBIG_Contribution</span></div>
+                <div class="payslip-item"><strong>Withholding Tax:</strong> <span>$WithholdingTax</span></div>
+                <div class="payslip-item"><strong>Other Deductions:</strong> <span>$OtherDeductionsTotal</span></div>
+                <hr>
+                <div class="payslip-item"><strong>TOTAL DEDUCTIONS:</strong> <span>$TotalDeductions</span></div>
+            </div>
+        </div>
+
+        <div class="summary">
+            <div class="payslip-item net-pay"><strong>NET PAY:</strong> <span>$NetIncome</span></div>
+        </div>
+
+        <div class="payslip-footer">
+            <p>This is a system-generated payslip. If you have any questions, please contact HR.</p>
+            <p>Generated on: $GeneratedOn</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+
+def format_money(amount: Any) -> str:
+    try:
+        return f"{float(amount):,.2f}"
+    except (TypeError, ValueError):
+        return '0.00'
+
+
+def format_date(value: Any) -> str:
+    if not value:
+        return 'N/A'
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d')
+    return value.strftime('%b %d, %Y')
+
+
+def payslip_filename(row: Dict[str, Any]) -> str:
+    return f"payslip_{row['PayrollID']}_{row['EmployeeID']}_{row['PayslipID']}.html"
+
+
+def render_payslip(row: Dict[str, Any], generated_on: str) -> str:
+    """Render a single payslip row (as returned by PAYSLIPS_QUERY) to HTML"""
+    values = {field: html.escape(format_money(row.get(field))) for field in MONEY_FIELDS}
+    values.update({field: html.escape(str(row.get(field) or 'N/A')) for field in TEXT_FIELDS})
+    values['PayPeriodStart'] = format_date(row.get('PayPeriodStartDate'))
+    values['PayPeriodEnd'] = format_date(row.get('PayPeriodEndDate'))
+    values['PaymentDate'] = format_date(row.get('PaymentDate'))
+    values['GeneratedOn'] = generated_on
+
+    hourly_rate = row.get('HourlyRate')
+    values['HourlyBlock'] = HOURLY_TEMPLATE.substitute(values) if hourly_rate and float(hourly_rate) > 0 else ''
+    return PAYSLIP_TEMPLATE.substitute(values)
+
+
+def part_path(archive_path: str, part: int, parts: int) -> str:
+    """Archive path written by one worker; a single worker writes ``archive_path`` itself"""
+    if parts == 1:
+        return archive_path
+    root, ext = os.path.splitext(archive_path)
+    return f"{root}.part{part + 1:03d}{ext or '.zip'}"
+
+
+def _write_part(rows: List[Dict[str, Any]], generated_on: str, archive_path: Optional[str],
+                output_dir: Optional[str]) -> Tuple[int, int]:
+    """Worker entry point: render, compress and write a slice of rows.
+
+    Rendering and DEFLATE both happen here, so the parent only collects
+    (payslip count, html bytes) instead of shipping the HTML back.
+    """
+    html_bytes = 0
+    archive = zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) if archive_path else None
+    try:
+        for row in rows:
+            filename = payslip_filename(row)
+            content = render_payslip(row, generated_on).encode('utf-8')
+            if archive:
+                archive.writestr(filename, content)
+            if output_dir:
+                with open(os.path.join(output_dir, filename), 'wb') as f:
+                    f.write(content)
+            html_bytes += len(content)
+    finally:
+        if archive:
+            archive.close()
+    return len(rows), html_bytes
+
+
+class PayslipBatchRenderer:
+    """Renders a whole payroll run's payslips across a process pool.
+
+    Each worker renders a contiguous slice of the run and writes its own files
+    (or its own part archive), so compression is spread across processes too.
+    """
+
+    def __init__(self, db_config: Dict[str, Any], workers: Optional[int] = None, min_rows_per_worker: int = 500):
+        self.db_config = db_config
+        self.workers = workers or os.cpu_count() or 1
+        self.min_rows_per_worker = min_rows_per_worker
+
+    def get_connection(self):
+        """Get database connection"""
+        try:
+            return pymysql.connect(**self.db_config, cursorclass=pymysql.cursors.DictCursor)
+        except Exception as e:
+            logger.error(f"Database connection error: {e}")
+            return None
+
+    def load_payslips(self, payroll_id: int) -> List[Dict[str, Any]]:
+        """Load every payslip of the run with employee details in one query"""
+        conn = self.get_connection()
+        if not conn:
+            raise ConnectionError('Database connection failed')
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(PAYSLIPS_QUERY, (payroll_id,))
+                return list(cursor.fetchall())
+        finally:
+            conn.close()
+
+    def worker_count(self, row_count: int) -> int:
+        """Number of worker processes actually used for ``row_count`` payslips"""
+        by_size = -(-row_count // self.min_rows_per_worker)
+        return max(1, min(self.workers, by_size))
+
+    def render_run(self, payroll_id: int, archive_path: Optional[str] = None,
+                   output_dir: Optional[str] = None) -> Dict[str, Any]:
+        """Render a payroll run to zip archive(s) and/or one file per employee.
+
+        With more than one worker the archive is split into one part per worker
+        (``<name>.part001.zip``, ...). Raises ValueError if the run has no payslips.
+        Returns throughput statistics for the run.
+        """
+        if not archive_path and not output_dir:
+            raise ValueError('archive_path or output_dir is required')
+
+        started = time.perf_counter()
+        rows = self.load_payslips(payroll_id)
+        loaded = time.perf_counter()
+        if not rows:
+            raise ValueError(f"Payroll run {payroll_id} not found or has no payslips")
+
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        generated_on = datetime.now().strftime('%b %d, %Y %H:%M:%S')
+        workers = self.worker_count(len(rows))
+        slice_size = -(-len(rows) // workers)
+        slices = [rows[i:i + slice_size] for i in range(0, len(rows), slice_size)]
+        archive_paths = [part_path(archive_path, n, len(slices)) for n in range(len(slices))] if archive_path else []
+
+        jobs = [(rows_slice, generated_on, archive_paths[n] if archive_path else None, output_dir)
+                for n, rows_slice in enumerate(slices)]
+        if len(jobs) == 1:
+            results = [_write_part(*jobs[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+                results = list(pool.map(_write_part, *zip(*jobs)))
+
+        count = sum(r[0] for r in results)
+        total_bytes = sum(r[1] for r in results)
+        finished = time.perf_counter()
+        render_seconds = finished - loaded
+        return {
+            'payroll_id': payroll_id,
+            'payslip_count': count,
+            'archive_paths': archive_paths,
+            'output_dir': output_dir,
+            'html_bytes': total_bytes,
+            'archive_bytes': sum(os.path.getsize(p) for p in archive_paths) if archive_paths else None,
+            'workers': len(jobs),
+            'query_seconds': round(loaded - started, 3),
+            'render_seconds': round(render_seconds, 3),
+            'total_seconds': round(finished - started, 3),
+            'payslips_per_second': round(count / render_seconds, 1) if render_seconds > 0 else None,
+        }
+
+
+if __name__ == '__main__':
+    # Usage (from python/): python -m services.payslip_renderer 42 --archive run_42.zip
+    from config import Config
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Render all payslips of a payroll run')
+    parser.add_argument('payroll_id', type=int)
+    parser.add_argument('--archive', help='Write compressed zip archive(s) to this path (one part per worker)')
+    parser.add_argument('--output-dir', help='Write one HTML file per employee to this directory')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    renderer = PayslipBatchRenderer(Config.get_db_config(), workers=args.workers)
+    report = renderer.render_run(args.payroll_id, archive_path=args.archive, output_dir=args.output_dir)
+    logger.info(f"Rendered {report['payslip_count']} payslips in {report['total_seconds']}s "
+                f"({report['payslips_per_second']} payslips/s, {report['workers']} worker(s))")
@@ -0,0 +1,143 @@
+"""
+Resilience Helpers
+Circuit breaker, concurrency limiter and stale-result cache used to keep the
+API responsive when the database or SMTP backend is slow
+"""
+
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """Fails fast after repeated backend failures.
+
+    closed    -> calls pass through; ``failure_threshold`` consecutive failures open it
+    open      -> calls are rejected with CircuitOpenError for ``reset_timeout`` seconds
+    half_open -> one trial call is let through; success closes, failure re-opens
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+                 is_failure: Optional[Callable[[BaseException], bool]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_exceptions = failure_exceptions
+        # Optional finer-grained classifier, used instead of failure_exceptions
+        self.is_failure = is_failure
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                raise CircuitOpenError(f"{self.name} circuit is half-open")
+            self._trial_in_flight = True
+
+    def _is_failure(self, exc: BaseException) -> bool:
+        if self.is_failure is not None:
+            check = self.is_failure
+        else:
+            check = lambda e: isinstance(e, self.failure_exceptions)
+        # pandas wraps driver errors, so look at the cause as well
+        return check(exc) or (exc.__cause__ is not None and check(exc.__cause__))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Call ``func`` through the breaker"""
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            if self._is_failure(e):
+                self.record_failure()
+            else:
+                # Not a backend failure (e.g. a bad query); just release a half-open trial
+                with self._lock:
+                    self._trial_in_flight = False
+            raise
+        self.record_success()
+        return result
+
+
+class ConcurrencyLimiter:
+    """Caps the number of requests of one class running at the same time"""
+
+    def __init__(self, name: str, max_concurrent: int, wait_timeout: float = 0.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.wait_timeout = wait_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+
+    def acquire(self) -> bool:
+        if self.wait_timeout > 0:
+            return self._semaphore.acquire(timeout=self.wait_timeout)
+        return self._semaphore.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+class StaleCache:
+    """Keeps the last good result per key so it can be served while a backend is down"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time(), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Return (stored_at, value) or None"""
+        with self._lock:
+            return self._entries.get(key)
@@ -0,0 +1,215 @@
+"""
+Turnover Engine
+Headcount, attrition and hire-cohort retention computed from one extraction of
+hire/termination dates
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+import logging
+from typing import Any, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DateLike = Union[str, date, datetime, np.datetime64]
+
+
+def to_day(value: DateLike) -> np.datetime64:
+    """Normalise a date-like value to numpy day precision"""
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+def year_range(year: int) -> Tuple[date, date]:
+    """Half-open [Jan 1, next Jan 1) range covering a calendar year
+
+    Used so date filters can be written as ``col >= %s AND col < %s``, which
+    can use an index on ``col``, unlike ``YEAR(col) = %s``.
+    """
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def validate_window(start_date: DateLike, end_date: DateLike) -> Tuple[np.datetime64, np.datetime64]:
+    """Parse an inclusive [start, end] window, raising ValueError if it is malformed or reversed"""
+    start, end = to_day(start_date), to_day(end_date)
+    if start > end:
+        raise ValueError('start_date must not be after end_date')
+    return start, end
+
+
+class TurnoverEngine:
+    """Vectorised turnover/retention metrics over employee hire and exit dates.
+
+    Historical series count an employee towards headcount from their HireDate
+    (inclusive) until their TerminationDate (exclusive). Current figures (e.g.
+    ``average_tenure_days()`` without a date) follow ``IsActive`` instead, as the
+    SQL metrics do. All windows are served from the arrays loaded once, so
+    different date ranges do not re-query the database.
+    """
+
+    EXTRACT_QUERY = """
+    SELECT HireDate, TerminationDate, IsActive
+    FROM Employees
+    WHERE HireDate IS NOT NULL
+    """
+
+    def __init__(self, hire_dates: np.ndarray, termination_dates: np.ndarray,
+                 is_active: Optional[np.ndarray] = None, as_of: Optional[DateLike] = None):
+        self.hire_dates = np.asarray(hire_dates, dtype='datetime64[D]')
+        self.termination_dates = np.asarray(termination_dates, dtype='datetime64[D]')
+        if is_active is None:
+            is_active = np.isnat(self.termination_dates)
+        self.is_active = np.asarray(is_active, dtype=bool)
+        self.as_of = to_day(as_of) if as_of is not None else np.datetime64(date.today(), 'D')
+
+        # Sorted copies make every "how many before X" question a binary search
+        self._sorted_hires = np.sort(self.hire_dates)
+        terminated = self.termination_dates[~np.isnat(self.termination_dates)]
+        self._sorted_terminations = np.sort(terminated)
+
+    @classmethod
+    def from_connection(cls, conn, as_of: Optional[DateLike] = None) -> 'TurnoverEngine':
+        """Load hire/termination dates in a single query"""
+        with conn.cursor() as cursor:
+            cursor.execute(cls.EXTRACT_QUERY)
+            rows = cursor.fetchall()
+
+        if rows and isinstance(rows[0], dict):
+            rows = [(r['HireDate'], r['TerminationDate'], r['IsActive']) for r in rows]
+
+        hires = np.array([r[0] for r in rows], dtype='datetime64[D]')
+        terminations = np.array([r[1] if r[1] is not None else np.datetime64('NaT') for r in rows],
+                                dtype='datetime64[D]')
+        is_active = np.array([bool(r[2]) for r in rows], dtype=bool)
+        return cls(hires, terminations, is_active=is_active, as_of=as_of)
+
+    def __len__(self) -> int:
+        return len(self.hire_dates)
+
+    def headcount_at(self, days: np.ndarray) -> np.ndarray:
+        """Headcount on each given day (hires counted, same-day exits not)"""
+        days = np.asarray(days, dtype='datetime64[D]')
+        hired = np.searchsorted(self._sorted_hires, days, side='right')
+        exited = np.searchsorted(self._sorted_terminations, days, side='right')
+        return hired - exited
+
+    def _count_between(self, sorted_dates: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        return (np.searchsorted(sorted_dates, ends, side='left')
+                - np.searchsorted(sorted_dates, starts, side='left'))
+
+    def monthly_series(self, start_date: DateLike, end_date: DateLike) -> pd.DataFrame:
+        """Monthly headcount, hires, exits and attrition over the inclusive window [start, end].
+
+        The first and last months are clipped to the window, so partial-month
+        ranges count only the hires and exits that fall inside it.
+        """
+        start, end = validate_window(start_date, end_date)
+        months = np.arange(start.astype('datetime64[M]'), end.astype('datetime64[M]') + 1,
+                           dtype='datetime64[M]')
+        month_starts = np.maximum(months.astype('datetime64[D]'), start)
+        month_ends = np.minimum((months + 1).astype('datetime64[D]'), end + 1)
+
+        headcount_start = self.headcount_at(month_starts - 1)
+        headcount_end = self.headcount_at(month_ends - 1)
+        hires = self._count_between(self._sorted_hires, month_starts, month_ends)
+        exits = self._count_between(self._sorted_terminations, month_starts, month_ends)
+
+        average_headcount = (headcount_start + headcount_end) / 2.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            attrition = np.where(average_headcount > 0, exits / average_headcount, 0.0)
+
+        month_index = pd.DatetimeIndex(months)
+        return pd.DataFrame({
+            'year': month_index.year,
+            'month': month_index.month,
+            'period_start': [str(d) for d in month_starts],
+            'period_end': [str(d - 1) for d in month_ends],
+            'headcount_start': headcount_start,
+            'hires': hires,
+            'exits': exits,
+            'headcount_end': headcount_end,
+            'attrition_rate': np.round(attrition, 4),
+        })
+
+    def cohort_retention(self, start_date: DateLike, end_date: DateLike, horizon_months: int = 12) -> pd.DataFrame:
+        """Share of each monthly hire cohort still employed N months after the cohort month.
+
+        Offsets that have not been reached yet (relative to ``as_of``) are NaN.
+        """
+        start, end = validate_window(start_date, end_date)
+        end = end + 1
+        in_window = (self.hire_dates >= start) & (self.hire_dates < end)
+        hires = self.hire_dates[in_window]
+        terminations = self.termination_dates[in_window]
+
+        cohorts = np.arange(start.astype('datetime64[M]'), (end - 1).astype('datetime64[M]') + 1,
+                            dtype='datetime64[M]')
+        offsets = np.arange(horizon_months + 1)
+        columns = [f"month_{k}" for k in offsets]
+        if len(cohorts) == 0:
+            return pd.DataFrame(columns=['cohort', 'cohort_size'] + columns)
+
+        hire_months = hires.astype('datetime64[M]')
+        cohort_idx = (hire_months - cohorts[0]).astype(int)
+        # Months survived before exiting; still-employed staff survive past the horizon
+        exit_offset = np.full(len(hires), horizon_months + 1)
+        left = ~np.isnat(terminations)
+        exit_offset[left] = np.clip(
+            (terminations[left].astype('datetime64[M]') - hire_months[left]).astype(int),
+            0, horizon_months + 1)
+
+        exits_at = np.zeros((len(cohorts), horizon_months + 2), dtype=np.int64)
+        np.add.at(exits_at, (cohort_idx, exit_offset), 1)
+        cohort_sizes = exits_at.sum(axis=1)
+        # Retained at offset k = employees whose exit offset is greater than k
+        retained = cohort_sizes[:, None] - np.cumsum(exits_at, axis=1)[:, :horizon_months + 1]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = np.where(cohort_sizes[:, None] > 0, retained / cohort_sizes[:, None], np.nan)
+        as_of_month = self.as_of.astype('datetime64[M]')
+        not_reached = (cohorts[:, None] + offsets[None, :]) > as_of_month
+        rates = np.where(not_reached, np.nan, np.round(rates, 4))
+
+        frame = pd.DataFrame(rates, columns=columns)
+        frame.insert(0, 'cohort_size', cohort_sizes)
+        frame.insert(0, 'cohort', pd.DatetimeIndex(cohorts).strftime('%Y-%m'))
+        return frame
+
+    def average_tenure_days(self, as_of: Optional[DateLike] = None) -> float:
+        """Mean tenure in days of active employees.
+
+        Without ``as_of`` this matches ``AVG(DATEDIFF(CURDATE(), HireDate))``
+        over ``IsActive = 1``. With a date, employment on that day is derived
+        from hire/termination dates, since IsActive only reflects today.
+        """
+        if as_of is None:
+            as_of = self.as_of
+            active = self.is_active
+        else:
+            as_of = to_day(as_of)
+            active = (self.hire_dates <= as_of) & (np.isnat(self.termination_dates) | (self.termination_dates > as_of))
+        if not active.any():
+            return 0.0
+        return float((as_of - self.hire_dates[active]).astype(int).mean())
+
+    def summary(self, start_date: DateLike, end_date: DateLike, horizon_months: int = 12) -> Dict[str, Any]:
+        """Monthly series, cohort retention and window totals in JSON-ready form"""
+        validate_window(start_date, end_date)
+        monthly = self.monthly_series(start_date, end_date)
+        retention = self.cohort_retention(start_date, end_date, horizon_months)
+        average_headcount = ((monthly['headcount_start'] + monthly['headcount_end']) / 2.0).mean()
+        total_exits = int(monthly['exits'].sum())
+
+        return {
+            'start_date': str(to_day(start_date)),
+            'end_date': str(to_day(end_date)),
+            'monthly': monthly.to_dict('records'),
+            'cohort_retention': retention.replace({np.nan: None}).to_dict('records'),
+            'totals': {
+                'hires': int(monthly['hires'].sum()),
+                'exits': total_exits,
+                'average_headcount': round(float(average_headcount), 2) if len(monthly) else 0.0,
+                'attrition_rate': round(total_exits / average_headcount, 4) if average_headcount else 0.0,
+                'avg_tenure_days': round(self.average_tenure_days(end_date), 2),
+            },
+        }
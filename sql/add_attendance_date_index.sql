@@ -0,0 +1,5 @@
+-- Index used by the live dashboard stream (attendance_today topic), which filters on AttendanceDate = CURDATE().
+-- The existing (EmployeeID, AttendanceDate) index cannot serve that filter.
+-- Run this once on existing hr441 databases (`mysql -u root -p hr441 < add_attendance_date_index.sql`)
+
+ALTER TABLE AttendanceRecords ADD INDEX idx_attendance_date (AttendanceDate);
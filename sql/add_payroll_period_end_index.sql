@@ -0,0 +1,5 @@
+-- Index used by DataProcessor.generate_financial_summary, which filters payroll runs by
+-- PayPeriodEndDate >= <Jan 1> AND PayPeriodEndDate < <next Jan 1>.
+-- Run this once on existing hr441 databases (`mysql -u root -p hr441 < add_payroll_period_end_index.sql`)
+
+ALTER TABLE PayrollRuns ADD INDEX idx_payrollruns_periodend (PayPeriodEndDate);